@@ -1,10 +1,23 @@
-import json
+import argparse
+import asyncio
+import hashlib
 import os
+import tempfile
 import logging
-from openai import OpenAI
+import time
+from functools import lru_cache
+import aiofiles
+import aiohttp
+import httpx
+import openai
+import orjson
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 from gql import gql, Client
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import TransportQueryError, TransportServerError
 from gql.transport.requests import RequestsHTTPTransport
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 from dotenv import load_dotenv
 
 # Set up the logging configuration
@@ -34,9 +47,201 @@ transport = RequestsHTTPTransport(
     retries=3,
 )
 
-linearClient = Client(transport=transport, fetch_schema_from_transport=True)
+# All queries and mutations are static, so skip the schema introspection round-trip. Linear still validates
+# every operation on the server.
+linearClient = Client(transport=transport, fetch_schema_from_transport=False)
+
+# Async GraphQL client used to create issues concurrently
+async_transport = AIOHTTPTransport(
+    url="https://api.linear.app/graphql",
+    headers={"Authorization": f"{LINEAR_API_KEY}"},
+    ssl=True,
+)
+
+linearAsyncClient = Client(transport=async_transport, fetch_schema_from_transport=False)
+
+# Shared HTTP/2 connection pool, so concurrent DeepSeek requests reuse warm connections instead of opening a new
+# TLS connection per request
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    timeout=httpx.Timeout(600.0, connect=5.0),
+)
+
+# Retries are handled by create_chat_completion
+client = AsyncOpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com", http_client=http_client,
+                     max_retries=0)
+
+# Number of workers per pipeline stage. Extractors have at most one DeepSeek request in flight each, analyzers up to
+# one per file of their batch while falling back to single-file analyses
+MAX_CONCURRENT_REQUESTS = 8
+# Estimated number of tokens that may be sent to DeepSeek per minute
+TOKENS_PER_MINUTE = 1_000_000
+# Maximum number of tokens DeepSeek may generate per response
+MAX_OUTPUT_TOKENS = 8192
+# Maximum number of items waiting between two pipeline stages
+PIPELINE_QUEUE_SIZE = 4
+# Files larger than this are not sent for analysis
+MAX_FILE_BYTES = 32 * 1024
+# Analyses and extracted issues are cached here, keyed on a hash of their input
+CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "codeval")
+# Bump whenever the prompts change to invalidate cached results
+PROMPT_VERSION = "3"
+# Maximum number of issues created by a single Linear mutation
+ISSUE_MUTATION_BATCH_SIZE = 10
+# Maximum number of attempts for a DeepSeek or Linear request before giving up
+RETRY_ATTEMPTS = 6
+
+_wait_backoff = wait_exponential_jitter(initial=1, max=30)
+
+
+def wait_retry_after(retry_state):
+    """
+    Wait as long as the server asked for in its retry-after header, falling back to exponential backoff with jitter.
+
+    :param retry_state: The tenacity retry state of the failed attempt
+    :return: The number of seconds to wait before the next attempt
+    """
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(retry_after), 60.0)
+    except (TypeError, ValueError):
+        return _wait_backoff(retry_state)
+
+
+def is_retryable_linear_error(exception):
+    """
+    Check whether a failed Linear request is safe to retry.
+
+    Issue creation is not idempotent, so only errors where the request was certainly not applied are retried: rate
+    limits and failures to connect. Timeouts, dropped connections and server errors may happen after Linear already
+    created the issues, so retrying them could create duplicates.
+
+    :param exception: The exception raised by the request
+    :return: True if the request should be retried
+    """
+    if isinstance(exception, TransportQueryError):
+        # Linear reports rate limiting as a GraphQL error, in which case none of the mutations were applied
+        return any((error.get("extensions") or {}).get("code") == "RATELIMITED" for error in exception.errors or [])
+    if isinstance(exception, TransportServerError):
+        return exception.code == 429
+    # Raised before the request was sent, e.g. connection refused or DNS failure
+    return isinstance(exception, aiohttp.ClientConnectorError)
+
+
+def is_retryable_deepseek_error(exception):
+    """
+    Check whether a failed DeepSeek request is worth retrying: rate limits, server errors and connection problems,
+    including those that only surface while the response is being streamed.
+
+    :param exception: The exception raised by the request
+    :return: True if the request should be retried
+    """
+    if isinstance(exception, (openai.RateLimitError, openai.InternalServerError)):
+        return True
+    # Connection errors and error events sent in the middle of the stream have no HTTP status
+    if isinstance(exception, openai.APIError) and not isinstance(exception, openai.APIStatusError):
+        return True
+    # Read errors and timeouts raised by httpx while iterating over the stream
+    return isinstance(exception, httpx.TransportError)
+
+
+deepseek_retry = retry(
+    stop=stop_after_attempt(RETRY_ATTEMPTS),
+    wait=wait_retry_after,
+    retry=retry_if_exception(is_retryable_deepseek_error),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+
+linear_retry = retry(
+    stop=stop_after_attempt(RETRY_ATTEMPTS),
+    wait=wait_retry_after,
+    retry=retry_if_exception(is_retryable_linear_error),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+
+
+class TruncatedResponseError(Exception):
+    """
+    Raised when DeepSeek stopped generating a response because it reached max_tokens.
+    """
+
+
+class TokenBucket:
+    """
+    Rate limiter handing out tokens from a bucket that refills continuously up to its capacity.
+
+    Requests are served in the order they call acquire, so a large request is not starved by smaller ones.
+    """
+
+    def __init__(self, capacity, refill_rate):
+        """
+        :param capacity: The maximum number of tokens in the bucket
+        :param refill_rate: The number of tokens added to the bucket per second
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    async def acquire(self, n):
+        """
+        Take n tokens from the bucket, waiting until enough tokens are available.
+
+        :param n: The number of tokens to take, capped at the bucket capacity
+        """
+        n = min(n, self.capacity)
+        async with self.lock:
+            self._refill()
+            while self.tokens < n:
+                await asyncio.sleep((n - self.tokens) / self.refill_rate)
+                self._refill()
+            self.tokens -= n
+
+
+token_bucket = TokenBucket(capacity=TOKENS_PER_MINUTE, refill_rate=TOKENS_PER_MINUTE / 60)
+
+
+@deepseek_retry
+async def create_chat_completion(**kwargs):
+    """
+    Send a chat completion request to DeepSeek, retrying on rate limits, server errors and connection problems.
+
+    Each attempt first takes its estimated input and output tokens from the token bucket, so concurrent requests
+    stay within TOKENS_PER_MINUTE however large their prompts are.
+
+    The response is streamed and the chunks are collected as they arrive, so the connection never sits idle while a
+    long response is generated. A failed attempt is retried from the start, never resumed from a partial response.
+
+    :param kwargs: The arguments passed on to client.chat.completions.create
+    :return: The content of the response message
+    :raises TruncatedResponseError: If the response was cut off at max_tokens
+    """
+    kwargs.setdefault("max_tokens", MAX_OUTPUT_TOKENS)
+    await token_bucket.acquire(
+        sum(estimate_tokens(message["content"]) for message in kwargs["messages"]) + kwargs["max_tokens"]
+    )
+
+    chunks = []
+    finish_reason = None
+    async for chunk in await client.chat.completions.create(stream=True, **kwargs):
+        if chunk.choices:
+            chunks.append(chunk.choices[0].delta.content or "")
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+
+    if finish_reason == "length":
+        raise TruncatedResponseError(f"Response was cut off at {kwargs['max_tokens']} tokens")
+    return "".join(chunks)
 
-client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
 
 class LinearIssue(BaseModel):
     title: str
@@ -44,274 +249,551 @@ class LinearIssue(BaseModel):
     priority: int = 0
 
 
-def get_file_paths(directory, exclude_file_types=None, exclude_dirs=None, exclude_files=None):
+class IssuesEnvelope(BaseModel):
+    issues: list[LinearIssue]
+
+
+def scan_tree(directory, exclude_dirs=None, exclude_files=None, exclude_file_types=None):
     """
-    Recursively get a list of all file paths in a directory, excluding specified file types, directories, and files.
+    Walk a directory once and return both its tree-like graph and the list of file paths in it.
+
+    Excluded directories and files are left out of both, files with an excluded extension only out of the file
+    paths. Symlinks are never followed: a symlinked directory is listed without children, and symlinked files,
+    including broken ones, are listed like regular files.
 
-    :param directory: The root directory to start the search
-    :param exclude_file_types: A list of file extensions to exclude (e.g., ['.txt', '.log'])
+    :param directory: The root directory to start the traversal
     :param exclude_dirs: A list of directory names to exclude (e.g., ['node_modules', '__pycache__'])
     :param exclude_files: A list of specific filenames to exclude (e.g., ['.env', '.gitignore'])
-    :return: A list of file paths
+    :param exclude_file_types: A list of file extensions to exclude from the file paths (e.g., ['.txt', '.log'])
+    :return: A tuple of the directory graph string and the list of file paths
     """
-    exclude_file_types = exclude_file_types or []
-    exclude_dirs = exclude_dirs or []
-    exclude_files = exclude_files or []
+    exclude_dirs = frozenset(exclude_dirs or ())
+    exclude_files = frozenset(exclude_files or ())
+    exclude_file_types = tuple(exclude_file_types or ())
     file_paths = []
+    # Maps each visited directory to its sorted (name, path, is_dir) children shown in the graph
+    children = {}
 
     for root, dirs, files in os.walk(directory):
         # Remove excluded directories from the traversal
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        dirs[:] = sorted(d for d in dirs if d not in exclude_dirs)
 
-        for file in files:
-            # Skip files with excluded extensions or filenames
-            if (any(file.endswith(ext) for ext in exclude_file_types) or
-                    file in exclude_files):
+        entries = [(d, os.path.join(root, d), True) for d in dirs]
+        for file in sorted(files):
+            if file in exclude_files:
                 continue
 
-            file_paths.append(os.path.join(root, file))
+            # Join each path once and share it between the graph and the file list
+            path = os.path.join(root, file)
+            entries.append((file, path, False))
+
+            # Skip files with excluded extensions
+            if not file.endswith(exclude_file_types):
+                file_paths.append(path)
+
+        # Merges the two already sorted runs of directories and files
+        entries.sort()
+        children[root] = entries
 
-    return file_paths
+    # Join all lines of the tree once instead of joining every subtree on the way up
+    return "\n".join(_render_tree(children, directory, "")), file_paths
 
 
-def get_directory_graph(directory, prefix="", exclude_dirs=None, exclude_files=None):
+def _render_tree(children, path, prefix):
     """
-    Recursively generate a tree-like graph of the directory structure, excluding specified directories and files.
+    Yield the lines of the directory graph below a directory.
 
-    :param directory: The root directory to start the traversal
+    :param children: The mapping of directories to their sorted (name, path, is_dir) children built by scan_tree
+    :param path: The directory to render
     :param prefix: The prefix for the current level of the tree
-    :param exclude_dirs: A list of directory names to exclude (e.g., ['node_modules', '__pycache__'])
-    :param exclude_files: A list of specific filenames to exclude (e.g., ['.env', '.gitignore'])
-    :return: A string representing the directory structure
+    :return: An iterator over the lines of the graph
     """
-    exclude_dirs = exclude_dirs or []
-    exclude_files = exclude_files or []
-    graph = []
+    entries = children.get(path, [])
+    for index, (name, entry_path, is_dir) in enumerate(entries):
+        is_last = index == len(entries) - 1
+        yield f"{prefix}{'└── ' if is_last else '├── '}{name}"
+        if is_dir:
+            yield from _render_tree(children, entry_path, prefix + ("    " if is_last else "│   "))
+
+
+_ANALYSIS_PROMPT = """
+# Python Code Analysis - Senior Engineer Evaluation
+
+You are a senior software engineer tasked with performing a comprehensive code review of a Python file. Your goal is to evaluate the code quality, identify issues, and provide actionable feedback to improve the code. You will consider various aspects including code style, architecture, security, performance, and best practices.
+
+## Input Format
+
+You'll be provided with:
+1. A Python file's content
+2. The filename
+3. The project directory structure
+
+## Analysis Criteria
+
+Analyze the code based on the following criteria:
+
+### 1. Code Structure and Organization
+- Evaluate overall code structure and organization
+- Check modularity and single responsibility principle
+- Assess if the file is appropriately placed in the project structure
+- Check import organization and necessity
+
+### 2. Code Quality
+- Identify code smells and anti-patterns
+- Evaluate function/method naming and purpose clarity
+- Check variable naming conventions
+- Assess code readability and maintainability
+- Check docstrings and comments quality
+- Evaluate error handling approach
+
+### 3. Security Issues
+- Identify hardcoded secrets or credentials
+- Check for insecure API calls
+- Identify potential injection vulnerabilities
+- Check for proper access control
+- Evaluate input validation
+- Assess logging practices (sensitive data exposure)
+
+### 4. Performance Considerations
+- Identify potential performance bottlenecks
+- Check for inefficient algorithms or data structures
+- Assess resource management
+- Evaluate concurrency and threading issues
+- Identify repeated operations that could be optimized
+
+### 5. Dependency Management
+- Evaluate external library usage
+- Check for deprecated methods/functions
+- Identify potential library version conflicts
+- Assess error handling for external dependencies
+
+### 6. Testing Considerations
+- Assess testability of the code
+- Identify areas lacking proper test coverage
+- Check for hardcoded test values
+
+### 7. Architecture and Design
+- Evaluate how the file fits into the overall project architecture
+- Check for appropriate abstractions
+- Assess coupling with other modules
+- Identify violations of SOLID principles
+- Evaluate API design (if applicable)
+
+### 8. Environment Configuration
+- Assess environment variable handling
+- Check for configuration management issues
+- Identify platform-specific code
+
+### 9. Best Practices Compliance
+- Check adherence to Python best practices (PEP 8, etc.)
+- Identify non-Pythonic code patterns
+- Evaluate type hinting usage and correctness
+- Check for proper exception handling
+
+### 10. Documentation
+- Assess the completeness of docstrings
+- Check for missing parameter/return documentation
+- Evaluate overall code documentation quality
+
+## Output Format
+
+Provide your analysis in the following format:
+
+**0. File name of analyzed source file**
+Echo the file name of the analyzed source file
+
+**1. Summary**
+A brief overview of the code and its purpose based on your analysis.
+
+**2. Critical Issues**
+Identify 3-5 most important issues that should be addressed immediately, ordered by priority.
+
+**3. Detailed Analysis**
+Organize your detailed findings by the categories listed in the analysis criteria. For each issue:
+- Provide the specific line number or code snippet
+- Explain why it's an issue
+- Suggest a concrete improvement
+
+**4. Refactoring Suggestions**
+Provide specific code suggestions for the most critical issues. Show both the current code and your suggested improvement.
 
+**5. Architecture Recommendations**
+Based on the project structure, suggest any architectural improvements that could benefit this code.
+
+**6. Overall Assessment**
+Provide a high-level assessment of the code quality on a scale of 1-5, with specific justification.
+
+## Example Analysis
+
+Here's a partial example of what your analysis might look like:
+
+```
+# Code Analysis: user_authentication.py
+
+## Summary
+This file implements user authentication functionality for the application, handling user login, session management, and password validation.
+
+## Critical Issues
+1. [HIGH] Hardcoded API secret key at line 42
+2. [HIGH] Passwords are stored in plaintext at line 78
+3. [MEDIUM] No rate limiting for authentication attempts
+4. [MEDIUM] Overly broad exception handling at lines 90-92
+
+## Detailed Analysis
+
+### Security Issues
+- **Line 42**: Hardcoded API key `API_KEY = "sk_live_12345"` should be moved to environment variables
+  ```python
+  # Current:
+  API_KEY = "sk_live_12345"
+
+  # Suggested:
+  API_KEY = os.environ.get("API_KEY")
+  if not API_KEY:
+      raise EnvironmentError("API_KEY environment variable is not set")
+  ```
+...
+```
+
+Remember to be thorough but concise, focusing on providing actionable feedback that will genuinely improve the code quality.
+"""
+
+_BATCH_ANALYSIS_INSTRUCTIONS = """
+## Batch Mode
+
+Instead of a single file, you will be given a JSON object with an array of "files", each with a "file_id", a
+"file_name" and a "file_content". Analyze every file independently following the instructions above and return a
+JSON object of the form:
+
+{"analyses": [{"file_id": <file_id as given>, "analysis_markdown": "<analysis in the output format above>"}]}
+
+Return exactly one entry per input file and echo each "file_id" exactly as given.
+"""
+
+# Kept as a module-level constant so every batched request shares a byte-identical system prompt prefix,
+# which lets DeepSeek's context caching serve it from cache
+_BATCH_ANALYSIS_PROMPT = _ANALYSIS_PROMPT + _BATCH_ANALYSIS_INSTRUCTIONS
+
+# Rough upper bound of input tokens sent in a single batched analysis request
+BATCH_TOKEN_BUDGET = 60_000
+# Typical number of tokens of a single file's analysis; all analyses of a batch must fit into MAX_OUTPUT_TOKENS
+ANALYSIS_OUTPUT_TOKENS = 3000
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text using the ~4 characters per token rule of thumb.
+
+    :param text: The text to estimate
+    :return: The estimated token count
+    """
+    return len(text) // 4
+
+
+def get_file_batches(file_paths, directory_graph="", batch_size=2, token_budget=BATCH_TOKEN_BUDGET):
+    """
+    Split file paths into batches of at most batch_size files and roughly token_budget input tokens.
+
+    The token count is estimated from the file size, so files are not read here, and includes the system prompt
+    with the directory graph sent along with every batch. A single file exceeding the budget is put into a batch of
+    its own. The batch size is further capped so that the analyses of all files in a batch are expected to fit into
+    a single response of MAX_OUTPUT_TOKENS. Files larger than MAX_FILE_BYTES are left out, as they are never
+    analyzed.
+
+    :param file_paths: Paths of the files to batch
+    :param directory_graph: The project directory graph sent with every batch
+    :param batch_size: Maximum number of files per batch
+    :param token_budget: Maximum estimated number of input tokens per batch
+    :return: A list of lists of file paths
+    """
+    batch_size = max(1, min(batch_size, MAX_OUTPUT_TOKENS // ANALYSIS_OUTPUT_TOKENS))
+    prompt_tokens = estimate_tokens(with_directory_graph(_BATCH_ANALYSIS_PROMPT, directory_graph))
+    batches = []
+    batch = []
+    batch_tokens = prompt_tokens
+
+    for file_path in file_paths:
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            # Skipped with its reason once the analyzer tries to read it
+            size = 0
+        if size > MAX_FILE_BYTES:
+            logger.warning(f"Skipping {file_path}: {size} bytes exceeds the {MAX_FILE_BYTES} bytes limit "
+                           f"(~{size // 4} tokens).")
+            continue
+
+        file_tokens = size // 4
+        if batch and (len(batch) >= batch_size or batch_tokens + file_tokens > token_budget):
+            batches.append(batch)
+            batch = []
+            batch_tokens = prompt_tokens
+
+        batch.append(file_path)
+        batch_tokens += file_tokens
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+async def read_source_file(file_path):
+    """
+    Read a source file for analysis, skipping files that cannot be read, are too large or look binary.
+
+    :param file_path: Path of the file to read
+    :return: The file content, or None if the file was skipped
+    """
     try:
-        entries = sorted(os.listdir(directory))  # Sort entries for consistent output
-    except (PermissionError, FileNotFoundError):
-        return ""
+        size = os.path.getsize(file_path)
+        if size > MAX_FILE_BYTES:
+            logger.warning(f"Skipping {file_path}: {size} bytes exceeds the {MAX_FILE_BYTES} bytes limit "
+                           f"(~{size // 4} tokens).")
+            return None
 
-    # Filter out excluded items
-    entries = [entry for entry in entries
-               if (os.path.isdir(os.path.join(directory, entry)) and entry not in exclude_dirs) or
-               (os.path.isfile(os.path.join(directory, entry)) and entry not in exclude_files)]
+        async with aiofiles.open(file_path, 'r', errors="replace") as file:
+            file_content = await file.read(MAX_FILE_BYTES)
+    except OSError as e:
+        # Broken symlinks, files removed since the scan, missing permissions
+        logger.warning(f"Skipping {file_path}: cannot be read ({e.strerror or e}).")
+        return None
 
-    for index, entry in enumerate(entries):
-        path = os.path.join(directory, entry)
-        connector = "└── " if index == len(entries) - 1 else "├── "
-        graph.append(f"{prefix}{connector}{entry}")
+    if "\x00" in file_content[:1024]:
+        logger.warning(f"Skipping {file_path}: looks like a binary file.")
+        return None
 
-        if os.path.isdir(path):
-            extension = "    " if index == len(entries) - 1 else "│   "
-            subgraph = get_directory_graph(path, prefix + extension, exclude_dirs, exclude_files)
-            if subgraph:
-                graph.append(subgraph)
+    return file_content
 
-    return "\n".join(graph)
 
+def get_cache_path(suffix, *parts):
+    """
+    Get the cache file path for a result computed from the given inputs.
 
-def analyze_file(file_path, directory_graph):
-    file_content = ""
-    with open(file_path, 'r') as file:
-        file_content = file.read()
+    :param suffix: The file suffix of the cached result (e.g., '.md')
+    :param parts: The strings the result was computed from
+    :return: The path of the cache file, named after a hash of PROMPT_VERSION and the parts
+    """
+    digest = hashlib.blake2b(PROMPT_VERSION.encode(), digest_size=32)
+    for part in parts:
+        digest.update(b"\0" + part.encode())
+    return os.path.join(CACHE_DIR, digest.hexdigest() + suffix)
 
-    file_name = os.path.basename(file_path)
 
-    prompt = f"""
-            # Python Code Analysis - Senior Engineer Evaluation
-
-            You are a senior software engineer tasked with performing a comprehensive code review of a Python file. Your goal is to evaluate the code quality, identify issues, and provide actionable feedback to improve the code. You will consider various aspects including code style, architecture, security, performance, and best practices.
-
-            ## Input Format
-
-            You'll be provided with:
-            1. A Python file's content
-            2. The filename
-            3. The project directory structure
+async def read_cache(cache_path):
+    """
+    Read a cached result.
 
-            ## Analysis Criteria
+    :param cache_path: The path returned by get_cache_path
+    :return: The cached result, or None on a cache miss
+    """
+    try:
+        async with aiofiles.open(cache_path, 'r') as file:
+            return await file.read()
+    except FileNotFoundError:
+        return None
 
-            Analyze the code based on the following criteria:
 
-            ### 1. Code Structure and Organization
-            - Evaluate overall code structure and organization
-            - Check modularity and single responsibility principle
-            - Assess if the file is appropriately placed in the project structure
-            - Check import organization and necessity
+async def write_cache(cache_path, content):
+    """
+    Write a result to the cache, replacing the file atomically so concurrent readers never see a partial result.
 
-            ### 2. Code Quality
-            - Identify code smells and anti-patterns
-            - Evaluate function/method naming and purpose clarity
-            - Check variable naming conventions
-            - Assess code readability and maintainability
-            - Check docstrings and comments quality
-            - Evaluate error handling approach
+    Every write goes through its own temporary file, so concurrent writes of the same key do not interfere; the last
+    one wins, which is harmless as they cache a result for the same input.
 
-            ### 3. Security Issues
-            - Identify hardcoded secrets or credentials
-            - Check for insecure API calls
-            - Identify potential injection vulnerabilities
-            - Check for proper access control
-            - Evaluate input validation
-            - Assess logging practices (sensitive data exposure)
-
-            ### 4. Performance Considerations
-            - Identify potential performance bottlenecks
-            - Check for inefficient algorithms or data structures
-            - Assess resource management
-            - Evaluate concurrency and threading issues
-            - Identify repeated operations that could be optimized
-
-            ### 5. Dependency Management
-            - Evaluate external library usage
-            - Check for deprecated methods/functions
-            - Identify potential library version conflicts
-            - Assess error handling for external dependencies
-
-            ### 6. Testing Considerations
-            - Assess testability of the code
-            - Identify areas lacking proper test coverage
-            - Check for hardcoded test values
-
-            ### 7. Architecture and Design
-            - Evaluate how the file fits into the overall project architecture
-            - Check for appropriate abstractions
-            - Assess coupling with other modules
-            - Identify violations of SOLID principles
-            - Evaluate API design (if applicable)
-
-            ### 8. Environment Configuration
-            - Assess environment variable handling
-            - Check for configuration management issues
-            - Identify platform-specific code
-
-            ### 9. Best Practices Compliance
-            - Check adherence to Python best practices (PEP 8, etc.)
-            - Identify non-Pythonic code patterns
-            - Evaluate type hinting usage and correctness
-            - Check for proper exception handling
-
-            ### 10. Documentation
-            - Assess the completeness of docstrings
-            - Check for missing parameter/return documentation
-            - Evaluate overall code documentation quality
-
-            ## Output Format
-
-            Provide your analysis in the following format:
-
-            **0. File name of analyzed source file**
-            Echo the file name of the analyzed source file
-
-            **1. Summary**
-            A brief overview of the code and its purpose based on your analysis.
-
-            **2. Critical Issues**
-            Identify 3-5 most important issues that should be addressed immediately, ordered by priority.
-
-            **3. Detailed Analysis**
-            Organize your detailed findings by the categories listed in the analysis criteria. For each issue:
-            - Provide the specific line number or code snippet
-            - Explain why it's an issue
-            - Suggest a concrete improvement
-
-            **4. Refactoring Suggestions**
-            Provide specific code suggestions for the most critical issues. Show both the current code and your suggested improvement.
-
-            **5. Architecture Recommendations**
-            Based on the project structure, suggest any architectural improvements that could benefit this code.
-
-            **6. Overall Assessment**
-            Provide a high-level assessment of the code quality on a scale of 1-5, with specific justification.
-
-            ## Example Analysis
-
-            Here's a partial example of what your analysis might look like:
-
-            ```
-            # Code Analysis: user_authentication.py
-
-            ## Summary
-            This file implements user authentication functionality for the application, handling user login, session management, and password validation.
-
-            ## Critical Issues
-            1. [HIGH] Hardcoded API secret key at line 42
-            2. [HIGH] Passwords are stored in plaintext at line 78
-            3. [MEDIUM] No rate limiting for authentication attempts
-            4. [MEDIUM] Overly broad exception handling at lines 90-92
-
-            ## Detailed Analysis
-
-            ### Security Issues
-            - **Line 42**: Hardcoded API key `API_KEY = "sk_live_12345"` should be moved to environment variables
-              ```python
-              # Current:
-              API_KEY = "sk_live_12345"
-
-              # Suggested:
-              API_KEY = os.environ.get("API_KEY")
-              if not API_KEY:
-                  raise EnvironmentError("API_KEY environment variable is not set")
-              ```
-            ...
-            ```
-
-            Remember to be thorough but concise, focusing on providing actionable feedback that will genuinely improve the code quality.
-            """
+    :param cache_path: The path returned by get_cache_path
+    :param content: The result to cache
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    os.close(fd)
+    try:
+        async with aiofiles.open(tmp_path, 'w') as file:
+            await file.write(content)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def with_directory_graph(system_prompt, directory_graph):
+    """
+    Append the project directory graph to a system prompt.
+
+    The graph is the same for every file of a run, so sending it in the system prompt instead of each user message
+    keeps the whole system message identical across requests and lets DeepSeek's prefix cache serve it.
 
-    response = client.chat.completions.create(
+    :param system_prompt: The static system prompt
+    :param directory_graph: The project directory graph
+    :return: The system prompt followed by the directory graph
+    """
+    return f"{system_prompt}\n\n# Project Directory\n{directory_graph}"
+
+
+async def analyze_file(file_path, directory_graph):
+    file_content = await read_source_file(file_path)
+    if file_content is None:
+        return None
+
+    file_name = os.path.basename(file_path)
+
+    cache_path = get_cache_path(".md", file_name, file_content)
+    if (analysis := await read_cache(cache_path)) is not None:
+        logger.info(f"Using cached analysis for {file_path}")
+        return analysis
+
+    analysis = await create_chat_completion(
         model="deepseek-chat",
         messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user",
-             "content": f"file content: {file_content}, file name: {file_name}, directory graph: {directory_graph}"}
-        ],
-        stream=False
+            {"role": "system", "content": with_directory_graph(_ANALYSIS_PROMPT, directory_graph)},
+            {"role": "user", "content": f"file content: {file_content}, file name: {file_name}"}
+        ]
     )
 
-    return response.choices[0].message.content
-
-def extract_issues(user_prompt):
-    system_prompt = """
-    The user will provide a code review. Please extract actionable issues and output them in JSON format.
-
-    EXAMPLE INPUT:
-    ### 3. Security Issues
-
-    - **Line 45-48**: Hardcoded Sentry DSN should be moved to environment variables
-    - **Line 94-99**: Overly permissive CORS configuration (`allow_origins=["*"]`, `allow_methods=["*"]`, `allow_headers=["*"]`) is a security risk
-    - **Line 67-70**: While environment variables are checked, their values could potentially be logged if an error occurs
-
-    EXAMPLE JSON OUTPUT:
-    {
-        "issues": [
-            {
-                "title": "Move Sentry DSN to environment variables",
-                "description": "Currently hardcoded in the code. This should be moved to environment variables for security.",
-                "priority": 2
-            },
-            {
-                "title": "Restrict CORS configuration",
-                "description": "The current CORS configuration is overly permissive and could lead to security vulnerabilities.",
-                "priority": 1
-            },
-            {
-                "title": "Check environment variable values before logging",
-                "description": "Ensure that sensitive information is not logged when an error occurs.",
-                "priority": 3
-            }
-        ]
-    }
+    await write_cache(cache_path, analysis)
+    return analysis
 
-    The field "priority" can be 0 - no priority, 1 - urgent, 2 - high, 3 - medium, and 4 - low priority. If you are not sure, please leave it at 0.
+
+async def analyze_files_batch(file_paths, directory_graph):
     """
+    Analyze several files with a single DeepSeek request.
+
+    Files with a cached analysis are not sent again. A single remaining file is analyzed with analyze_file. Files
+    missing from the batched response, for example because it was cut off, are analyzed on their own concurrently.
 
-    messages = [{"role": "system", "content": system_prompt},
+    :param file_paths: Paths of the Python files to analyze together
+    :param directory_graph: The project directory graph passed along to the analysis
+    :return: A tuple of a dict mapping each file path to its analysis, leaving out files skipped by
+        read_source_file, and the list of paths of the files that failed
+    """
+    analyses = {}
+    analyzed_paths = []
+    failed_paths = []
+    cache_paths = {}
+    uncached_paths = []
+    files = []
+    for file_path in file_paths:
+        try:
+            file_content = await read_source_file(file_path)
+            if file_content is None:
+                continue
+
+            cache_paths[file_path] = get_cache_path(".md", os.path.basename(file_path), file_content)
+            analysis = await read_cache(cache_paths[file_path])
+        except Exception as e:
+            logger.error(f"Could not analyze {file_path}: {e!r}")
+            failed_paths.append(file_path)
+            continue
+
+        analyzed_paths.append(file_path)
+        if analysis is not None:
+            logger.info(f"Using cached analysis for {file_path}")
+            analyses[file_path] = analysis
+        else:
+            # Only the base name is sent, like analyze_file does; results are mapped back by their file_id
+            uncached_paths.append(file_path)
+            files.append({"file_id": len(files), "file_name": os.path.basename(file_path),
+                          "file_content": file_content})
+
+    batch_analyses = {}
+    if len(files) > 1:
+        try:
+            response = await create_chat_completion(
+                model="deepseek-chat",
+                messages=[
+                    {"role": "system", "content": with_directory_graph(_BATCH_ANALYSIS_PROMPT, directory_graph)},
+                    {"role": "user", "content": orjson.dumps({"files": files}).decode()}
+                ],
+                response_format={
+                    'type': 'json_object'
+                }
+            )
+            for analysis in orjson.loads(response)["analyses"]:
+                file_id = analysis["file_id"]
+                if isinstance(file_id, int) and 0 <= file_id < len(uncached_paths):
+                    batch_analyses[uncached_paths[file_id]] = analysis["analysis_markdown"]
+        except TruncatedResponseError as e:
+            logger.warning(f"Batched analysis was cut off: {e}")
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Could not parse batched analysis response: {e}")
+        except Exception as e:
+            # E.g. a request rejected because of one of its files; analyzing them separately isolates that file
+            logger.warning(f"Batched analysis failed: {e!r}")
+
+    missing_paths = []
+    for file_path in uncached_paths:
+        if file_path in batch_analyses:
+            analyses[file_path] = batch_analyses[file_path]
+            await write_cache(cache_paths[file_path], analyses[file_path])
+        else:
+            if len(files) > 1:
+                logger.warning(f"No batched analysis returned for {file_path}, analyzing it separately.")
+            missing_paths.append(file_path)
+
+    results = await asyncio.gather(*[analyze_file(file_path, directory_graph) for file_path in missing_paths],
+                                   return_exceptions=True)
+    for file_path, result in zip(missing_paths, results):
+        if isinstance(result, Exception):
+            logger.error(f"Could not analyze {file_path}: {result!r}")
+            failed_paths.append(file_path)
+        elif result is not None:
+            analyses[file_path] = result
+
+    return {file_path: analyses[file_path] for file_path in analyzed_paths if file_path in analyses}, failed_paths
+
+
+_EXTRACT_PROMPT = """
+The user will provide a code review. Please extract actionable issues and output them in JSON format.
+
+EXAMPLE INPUT:
+### 3. Security Issues
+
+- **Line 45-48**: Hardcoded Sentry DSN should be moved to environment variables
+- **Line 94-99**: Overly permissive CORS configuration (`allow_origins=["*"]`, `allow_methods=["*"]`, `allow_headers=["*"]`) is a security risk
+- **Line 67-70**: While environment variables are checked, their values could potentially be logged if an error occurs
+
+EXAMPLE JSON OUTPUT:
+{
+    "issues": [
+        {
+            "title": "Move Sentry DSN to environment variables",
+            "description": "Currently hardcoded in the code. This should be moved to environment variables for security.",
+            "priority": 2
+        },
+        {
+            "title": "Restrict CORS configuration",
+            "description": "The current CORS configuration is overly permissive and could lead to security vulnerabilities.",
+            "priority": 1
+        },
+        {
+            "title": "Check environment variable values before logging",
+            "description": "Ensure that sensitive information is not logged when an error occurs.",
+            "priority": 3
+        }
+    ]
+}
+
+The field "priority" can be 0 - no priority, 1 - urgent, 2 - high, 3 - medium, and 4 - low priority. If you are not sure, please leave it at 0.
+"""
+
+
+async def extract_issues(user_prompt):
+    """
+    Extract actionable issues from a code review.
+
+    The JSON response is validated straight into typed issues by pydantic's JSON parser, without an intermediate dict.
+
+    :param user_prompt: The code review to extract issues from
+    :return: A list of LinearIssue objects
+    """
+    cache_path = get_cache_path(".json", user_prompt)
+    if (issues := await read_cache(cache_path)) is not None:
+        return IssuesEnvelope.model_validate_json(issues).issues
+
+    messages = [{"role": "system", "content": _EXTRACT_PROMPT},
                 {"role": "user", "content": user_prompt}]
 
-    response = client.chat.completions.create(
+    response = await create_chat_completion(
         model="deepseek-chat",
         messages=messages,
         response_format={
@@ -319,25 +801,36 @@ def extract_issues(user_prompt):
         }
     )
 
-    return response
+    issues = IssuesEnvelope.model_validate_json(response).issues
+    await write_cache(cache_path, response)
+    return issues
 
-mutation_create_issue = gql(
+@lru_cache
+def get_issue_create_mutation(count):
     """
-    mutation IssueCreate($input: IssueCreateInput!) {
-        issueCreate(input: $input) {
+    Build a mutation creating count issues at once, one aliased issueCreate field per issue.
+
+    :param count: The number of issues to create
+    :return: The parsed mutation, taking the issue inputs as variables $input0 to $input<count - 1>
+    """
+    variables = ", ".join(f"$input{i}: IssueCreateInput!" for i in range(count))
+    fields = "\n".join(
+        f"""
+        issue{i}: issueCreate(input: $input{i}) {{
             success
-            issue {
+            issue {{
                 id
                 title
                 url
-                team {
+                team {{
                     name
-                }
-            }
-        }
-    }
-    """
-)
+                }}
+            }}
+        }}"""
+        for i in range(count)
+    )
+    return gql(f"mutation IssueCreateBatch({variables}) {{{fields}\n}}")
+
 
 def get_team_id(team_name: str) -> str:
     """
@@ -362,99 +855,288 @@ def get_team_id(team_name: str) -> str:
     team_result = linearClient.execute(query_team, variable_values={"teamName": team_name})
     return team_result["teams"]["nodes"][0]["id"]  # Assumes the team exists
 
-def create_issue(title, description, priority, team_id):
-    issue_input = {
-        "title": title,
-        "description": description,
-        "teamId": team_id,
-        "priority": priority,
-        # "stateId": "state_id_here",  # e.g., "Backlog", "In Progress"
-    }
-    result = linearClient.execute(
-        mutation_create_issue,
-        variable_values={"input": issue_input},
+async def create_issues(session, issues, team_id):
+    """
+    Create issues in Linear, sending up to ISSUE_MUTATION_BATCH_SIZE issues per request and all requests concurrently.
+
+    A failed request does not affect the others. Every issue is reported as created, with its URL, or as failed.
+
+    :param session: An open session of linearAsyncClient
+    :param issues: The LinearIssue objects to create
+    :param team_id: The Linear team ID to create the issues for
+    :return: The URLs of the created issues
+    """
+    @linear_retry
+    async def create_batch(batch):
+        variable_values = {
+            f"input{i}": {
+                "title": issue.title,
+                "description": issue.description,
+                "teamId": team_id,
+                "priority": issue.priority,
+                # "stateId": "state_id_here",  # e.g., "Backlog", "In Progress"
+            }
+            for i, issue in enumerate(batch)
+        }
+        return await session.execute(get_issue_create_mutation(len(batch)), variable_values=variable_values)
+
+    batches = [issues[i:i + ISSUE_MUTATION_BATCH_SIZE] for i in range(0, len(issues), ISSUE_MUTATION_BATCH_SIZE)]
+    results = await asyncio.gather(*[create_batch(batch) for batch in batches], return_exceptions=True)
+
+    urls = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, TransportQueryError):
+            # Some of the aliased mutations may still have succeeded, their results are in the partial data
+            error = "; ".join(error.get("message", str(error)) for error in result.errors or []) or str(result)
+            result = result.data or {}
+        elif isinstance(result, Exception):
+            error = repr(result)
+            result = {}
+        else:
+            error = None
+
+        for i, issue in enumerate(batch):
+            created = result.get(f"issue{i}") or {}
+            if created.get("success") and created.get("issue"):
+                print(f"Issue created successfully: {issue.title}")
+                print(f"URL: {created['issue']['url']}")
+                urls.append(created["issue"]["url"])
+            else:
+                print(f"Could not create issue: {issue.title} ({error or 'not created'})")
+
+    return urls
+
+
+async def submit_issues(issues, team_id):
+    """
+    Open a Linear session and create the issues.
+
+    :param issues: The LinearIssue objects to create
+    :param team_id: The Linear team ID to create the issues for
+    :return: The URLs of the created issues
+    """
+    async with linearAsyncClient as session:
+        return await create_issues(session, issues, team_id)
+
+
+def parse_selection(selection, count):
+    """
+    Parse a selection of 1-based item numbers such as "1,3-5", "all" or "" (nothing).
+
+    :param selection: The selection entered by the user
+    :param count: The number of items to select from
+    :return: The sorted 0-based indices of the selected items
+    :raises ValueError: If the selection is malformed or out of range
+    """
+    selection = selection.strip().lower()
+    if selection == "all":
+        return list(range(count))
+
+    indices = set()
+    for part in filter(None, (part.strip() for part in selection.split(","))):
+        start, _, end = part.partition("-")
+        first, last = int(start), int(end or start)
+        if not 1 <= first <= last <= count:
+            raise ValueError(f"{part} is not within 1-{count}")
+        indices.update(range(first - 1, last))
+
+    return sorted(indices)
+
+
+def select_issues(issues):
+    """
+    Show all issues and let the user pick the ones to create with a single prompt.
+
+    :param issues: The LinearIssue objects to choose from
+    :return: The selected LinearIssue objects
+    """
+    for number, issue in enumerate(issues, start=1):
+        print(f"\n[{number}] {issue.title}")
+        print(f"Priority: {issue.priority}")
+        print(f"Description:\n{issue.description}")
+
+    while True:
+        selection = input("\nIssues to create in Linear (e.g. 1,3-5, 'all', or empty for none): ")
+        try:
+            return [issues[index] for index in parse_selection(selection, len(issues))]
+        except ValueError as e:
+            print(f"Invalid selection: {e}")
+
+
+async def run_pipeline(file_paths, directory_graph, team_id, auto_create=False, batch_size=2):
+    """
+    Analyze files, extract their issues and hand them over to Linear as a pipeline of concurrent stages.
+
+    Analyzer workers send batches of files to DeepSeek, extractor workers turn each analysis into issues and a
+    single issuer collects the issues. The stages are connected by bounded queues, so the next batch is analyzed
+    while the previous analyses are still being extracted. A batch or file that fails is logged and skipped, so it
+    does not end the run.
+
+    :param file_paths: Paths of the Python files to analyze
+    :param directory_graph: The project directory graph passed along to the analysis
+    :param team_id: The Linear team ID to create issues for
+    :param auto_create: Create every issue in Linear as soon as it is extracted instead of collecting it
+    :param batch_size: Maximum number of files per analysis request
+    :return: A tuple of the issues that were not created yet and the paths of the files that failed
+    """
+    batch_queue = asyncio.Queue()
+    analysis_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    issue_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    pending_issues = []
+    failed_files = []
+
+    for batch in get_file_batches(file_paths, directory_graph, batch_size=batch_size):
+        batch_queue.put_nowait(batch)
+
+    async def analyzer():
+        while not batch_queue.empty():
+            batch = batch_queue.get_nowait()
+            print("Analyzing files:", ", ".join(batch))
+            try:
+                analyses, failed_paths = await analyze_files_batch(batch, directory_graph)
+            except Exception as e:
+                logger.error(f"Could not analyze {', '.join(batch)}: {e!r}")
+                failed_files.extend(batch)
+                continue
+
+            failed_files.extend(failed_paths)
+
+            for file_path, analysis in analyses.items():
+                await analysis_queue.put((file_path, analysis))
+
+    async def extractor():
+        while (item := await analysis_queue.get()) is not None:
+            file_path, analysis = item
+            print(analysis)
+
+            print("Extracting issues:", file_path)
+            try:
+                issues = await extract_issues(analysis)
+            except Exception as e:
+                logger.error(f"Could not extract issues of {file_path}: {e!r}")
+                failed_files.append(file_path)
+                continue
+
+            for issue in issues:
+                issue.description += "\n\nfile path: " + file_path
+                await issue_queue.put(issue)
+
+    async def issuer():
+        if not auto_create:
+            while (issue := await issue_queue.get()) is not None:
+                pending_issues.append(issue)
+            return
+
+        async with linearAsyncClient as session:
+            batch = []
+            while (issue := await issue_queue.get()) is not None:
+                batch.append(issue)
+                if len(batch) == ISSUE_MUTATION_BATCH_SIZE:
+                    await create_issues(session, batch, team_id)
+                    batch = []
+            if batch:
+                await create_issues(session, batch, team_id)
+
+    async def run_stage(worker, count, next_queue, sentinels):
+        await asyncio.gather(*[worker() for _ in range(count)])
+        # Tell the workers of the next stage that no more items will come
+        for _ in range(sentinels):
+            await next_queue.put(None)
+
+    await asyncio.gather(
+        run_stage(analyzer, MAX_CONCURRENT_REQUESTS, analysis_queue, MAX_CONCURRENT_REQUESTS),
+        run_stage(extractor, MAX_CONCURRENT_REQUESTS, issue_queue, 1),
+        issuer(),
     )
-    print("Issue created successfully!")
-    print(f"URL: {result['issueCreate']['issue']['url']}")
+
+    return pending_issues, failed_files
 
 
 # Example usage:
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A senior engineer proof-reading your repo and creating Linear issues.")
+    parser.add_argument("directory", nargs="?", help="The directory to evaluate, asked for if omitted")
+    creation = parser.add_mutually_exclusive_group()
+    creation.add_argument("--yes", action="store_true", help="Create every extracted issue in Linear without asking")
+    creation.add_argument("--dry-run", action="store_true", help="Only print the extracted issues, create nothing")
+    parser.add_argument("--no-interactive", action="store_true",
+                        help="Never prompt; issues are only created with --yes and printed otherwise")
+    args = parser.parse_args()
+
     # Define exclusions
     exclude_dirs = [".idea", "data", ".venv", ".git", ".ruff_cache", ".pytest_cache", "__pycache__", "migrations",
                     "tests", "docs"]
     exclude_files = [".env", ".DS_Store", "__init__.py", ".gitignore"]
     exclude_types = [".pyc", ".pyo", ".pyd"]
 
-    # Get the directory path from the user
-    directory_path = input("Enter the directory path to evaluate: ")
-
-    # Generate the directory graph
-    directory_graph = get_directory_graph(
-        directory_path,
-        exclude_dirs=exclude_dirs,
-        exclude_files=exclude_files
-    )
+    if args.directory:
+        directory_path = args.directory
+    elif args.no_interactive:
+        parser.error("the directory argument is required with --no-interactive")
+    else:
+        # Get the directory path from the user
+        directory_path = input("Enter the directory path to evaluate: ")
 
-    # Get the list of files
-    files = get_file_paths(
+    # Generate the directory graph and the list of files in a single traversal
+    directory_graph, files = scan_tree(
         directory_path,
-        exclude_file_types=exclude_types,
         exclude_dirs=exclude_dirs,
-        exclude_files=exclude_files
+        exclude_files=exclude_files,
+        exclude_file_types=exclude_types
     )
 
     print(directory_graph)
     print("\nFile count:", len(files))
 
+    # Split Python files from the rest in a single pass
+    py_files = []
+    non_py_files = []
+    for f in files:
+        if f.endswith(".py"):
+            py_files.append(f)
+        else:
+            non_py_files.append(f)
+
     # Print only files that are not Python files
-    non_py_files = [f for f in files if not f.endswith(".py")]
     print("\nNon-Python files:")
     for f in non_py_files:
         print(f)
 
-    if not LINEAR_TEAM_NAME:
-        # Ask for the team name
-        LINEAR_TEAM_NAME = input("Enter the Linear team name: ")
-
-    # Based on the team name, get the team ID
-    team_id = get_team_id(LINEAR_TEAM_NAME)
-
-    print("\nAnalyzing Python files...")
-
-    # Analyze each file
-    for file_path in files:
-        if file_path.endswith(".py"):
-            print("Analyzing file:", file_path)
-            analysis = analyze_file(file_path, directory_graph)
+    # Issues can only be created if we are allowed to create them or ask for them
+    create = not args.dry_run and (args.yes or not args.no_interactive)
 
-            print(analysis)
-
-            print("\nExtracting issues...")
-            issues = extract_issues(analysis).choices[0].message.content
-
-            print("\nParsing issues...")
-            issues_json = json.loads(issues)["issues"]
+    team_id = None
+    if create:
+        if not LINEAR_TEAM_NAME:
+            if args.no_interactive:
+                parser.error("LINEAR_TEAM_NAME must be set with --no-interactive")
+            # Ask for the team name
+            LINEAR_TEAM_NAME = input("Enter the Linear team name: ")
 
-            # Loop through the issues
-            for issue in issues_json:
-                issue_in = LinearIssue(
-                    title=issue["title"],
-                    description=issue["description"] + "\n\nfile path: " + file_path,
-                    priority=issue["priority"]
-                )
+        # Based on the team name, get the team ID
+        team_id = get_team_id(LINEAR_TEAM_NAME)
 
-                print(f"Title: {issue_in.title}")
-                print(f"Priority: {issue_in.priority}")
-                print(f"Description:\n{issue_in.description}")
-
-                print("Create issue in Linear?")
-
-                if input("y/N: ") == "y":
-                    # Create the issue in Linear
-                    create_issue(title=issue_in.title, description=issue_in.description, priority=issue_in.priority, team_id=team_id)
-                    print("Linear issue created.")
-                else:
-                    print("No Linear issue created.")
-                    continue
+    print("\nAnalyzing Python files...")
 
+    # Analyze all Python files in a pipeline, creating issues right away if confirmation is skipped
+    pending_issues, failed_files = asyncio.run(run_pipeline(py_files, directory_graph, team_id, auto_create=args.yes))
+
+    if pending_issues and not create:
+        for issue_in in pending_issues:
+            print(f"\nTitle: {issue_in.title}")
+            print(f"Priority: {issue_in.priority}")
+            print(f"Description:\n{issue_in.description}")
+        print(f"\n{len(pending_issues)} issue(s) found, none created in Linear.")
+    elif pending_issues:
+        # Confirm all issues at once, then create the approved ones in Linear concurrently
+        approved_issues = select_issues(pending_issues)
+        if approved_issues:
+            urls = asyncio.run(submit_issues(approved_issues, team_id))
+            print(f"{len(urls)} of {len(approved_issues)} Linear issue(s) created.")
+        else:
+            print("No Linear issue created.")
+
+    if failed_files:
+        print(f"\nCould not analyze {len(failed_files)} file(s), see the log above:")
+        for f in failed_files:
+            print(f)